@@ -1,27 +1,97 @@
+import os
+
 import pandas as pd
 import numpy as np
 
+
+def read_climate_csv(path, date_col):
+    """
+    Read a climate CSV with a date column and a "temperature" column.
+    Temperatures are only meaningful to ~0.1 °C, so they are read as float32,
+    which halves memory and bandwidth for everything downstream.
+    """
+    dtype = {"temperature": "float32"}
+    try:
+        # Arrow parses the file with multithreaded C++ readers
+        df = pd.read_csv(path, engine="pyarrow", dtype=dtype, parse_dates=[date_col])
+    except (ImportError, ValueError):
+        # Without pyarrow (or for dates Arrow cannot parse), ISO 8601 dates still
+        # take pandas' fast parsing path
+        df = pd.read_csv(path, dtype=dtype, parse_dates=[date_col], date_format="ISO8601")
+    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        # Any other date layout: let pandas infer it, as a plain read_csv would
+        df[date_col] = pd.to_datetime(df[date_col])
+    return df
+
+
+def load_climate_data(csv_path, date_col):
+    """
+    Load a climate CSV through a Parquet copy cached next to it.
+    The inputs do not change between runs, so the CSV is parsed once and later
+    runs read the typed, columnar Parquet file instead. The cache is rebuilt
+    whenever the CSV is newer than it.
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if (os.path.exists(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return pd.read_parquet(parquet_path)
+
+    df = read_climate_csv(csv_path, date_col)
+    # Write under a temporary name and move it into place, so an interrupted or
+    # failed write never leaves a truncated cache that later runs would trust
+    tmp_path = parquet_path + ".tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+    except (ImportError, OSError):
+        # No Parquet engine, read-only directory, disk full, ...: the cache is
+        # only an optimization, so carry on with the parsed CSV
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return df
+
 # ------------------------------
 # Step 1: Load ERA5 hourly historical data
 # ------------------------------
 # Assume the ERA5 CSV file ("era5_hourly.csv") has columns: "datetime" and "temperature"
-era5 = pd.read_csv("era5_hourly.csv", parse_dates=["datetime"])
+era5 = load_climate_data("era5_hourly.csv", "datetime")
 era5.set_index("datetime", inplace=True)
 
 # ------------------------------
 # Step 2: Compute the diurnal cycle from ERA5 data
 # ------------------------------
-# Calculate the daily mean temperature
-era5['daily_mean'] = era5.resample('D')['temperature'].transform('mean')
+# When the record is a dense run of whole days (24 consecutive hours per day,
+# starting at midnight), view the temperatures as a (days, 24) array and work
+# with plain NumPy reductions; otherwise group the hours by calendar day
+n_hours = len(era5)
+dense = n_hours > 0 and n_hours % 24 == 0 and era5.index.equals(
+    pd.date_range(era5.index[0].normalize(), periods=n_hours, freq='h')
+)
+
+if dense:
+    t = era5['temperature'].to_numpy().reshape(-1, 24)
+    # Daily mean temperature and hourly deviations from it (means accumulate in float64)
+    daily_mean_1d = np.nanmean(t, axis=1, dtype=np.float64).astype(np.float32)
+    deviation = t - daily_mean_1d[:, None]
+    era5['hourly_deviation'] = deviation.ravel()
+    # Average hourly deviation (diurnal pattern) for each hour of the day
+    diurnal_pattern = pd.Series(
+        np.nanmean(deviation, axis=0, dtype=np.float64),
+        index=pd.Index(np.arange(24), name='hour'),
+        name='hourly_deviation',
+    )
+else:
+    # Calculate the daily mean temperature
+    daily_mean = era5.groupby(era5.index.normalize())['temperature'].transform('mean')
 
-# Compute hourly deviations from the daily mean
-era5['hourly_deviation'] = era5['temperature'] - era5['daily_mean']
+    # Compute hourly deviations from the daily mean
+    era5['hourly_deviation'] = era5['temperature'] - daily_mean
 
-# Extract the hour of the day (0-23)
-era5['hour'] = era5.index.hour
+    # Calculate the average hourly deviation (diurnal pattern) for each hour of the day
+    diurnal_pattern = era5.groupby(era5.index.hour.rename('hour'))['hourly_deviation'].mean()
 
-# Calculate the average hourly deviation (diurnal pattern) for each hour of the day
-diurnal_pattern = era5.groupby('hour')['hourly_deviation'].mean()
 print("Diurnal pattern (average hourly deviation):")
 print(diurnal_pattern)
 
@@ -29,36 +99,50 @@ print(diurnal_pattern)
 # Step 3: Load CMIP6 daily downscaled projections
 # ------------------------------
 # Assume the CMIP6 CSV file ("cmip6_daily.csv") has columns: "date" and "temperature"
-cmip6 = pd.read_csv("cmip6_daily.csv", parse_dates=["date"])
+cmip6 = load_climate_data("cmip6_daily.csv", "date")
 cmip6.set_index("date", inplace=True)
 
 # ------------------------------
 # Step 4: Disaggregate daily CMIP6 data to hourly using the diurnal pattern
 # ------------------------------
-# Create an empty list to store hourly records
-hourly_records = []
-
-# Loop over each day in the CMIP6 daily dataset
-for current_date, row in cmip6.iterrows():
-    daily_temp = row['temperature']
-    # Loop over each hour of the day (0 to 23)
-    for hour in range(24):
-        # Add the diurnal deviation for this hour to the daily mean
-        hourly_temp = daily_temp + diurnal_pattern.loc[hour]
-        # Create a timestamp for the current day and hour
-        timestamp = pd.Timestamp(current_date) + pd.Timedelta(hours=hour)
-        hourly_records.append({'datetime': timestamp, 'temperature': hourly_temp})
-
-# Create a DataFrame for the hourly CMIP6 data
-hourly_cmip6 = pd.DataFrame(hourly_records)
-hourly_cmip6.set_index('datetime', inplace=True)
-hourly_cmip6.sort_index(inplace=True)
+# Sort the days so the hourly series comes out in chronological order
+cmip6.sort_index(inplace=True)
+
+# Diurnal deviations as a fixed-length array where dev[hour] is the deviation for
+# that hour (0 to 23); an hour absent from ERA5 becomes NaN rather than shifting
+# the later hours. float32, so the broadcast add below stays in float32
+dev = diurnal_pattern.reindex(range(24)).to_numpy(np.float32)
+
+# Hour-of-day offsets added to each day's timestamp
+hour_offsets = np.arange(24, dtype='timedelta64[h]')
 
 # ------------------------------
 # Step 5: Save or inspect the resulting hourly CMIP6 dataset
 # ------------------------------
-print("Sample of disaggregated hourly CMIP6 data:")
-print(hourly_cmip6.head(24))
+# The hourly series is 24x the size of the daily input, so it is built and
+# appended to the CSV one chunk of days at a time instead of all at once
+output_path = "cmip6_hourly_projection.csv"
+chunk_days = 365
+
+for start in range(0, len(cmip6), chunk_days):
+    chunk = cmip6.iloc[start:start + chunk_days]
+
+    # Add the diurnal deviation for every hour to every daily mean in one broadcast:
+    # (days, 1) + (1, 24) -> (days, 24), flattened day by day
+    daily = chunk['temperature'].to_numpy()
+    hourly = (daily[:, None] + dev[None, :]).ravel()
+
+    # Timestamps for each day and hour; built from the daily index so that gaps in
+    # the CMIP6 calendar (e.g. missing leap days) are preserved. Broadcasting the
+    # days against hour offsets as datetime64 is plain integer arithmetic
+    days = chunk.index.to_numpy().astype('datetime64[h]')
+    idx = pd.DatetimeIndex((days[:, None] + hour_offsets[None, :]).ravel(), name='datetime')
+
+    hourly_chunk = pd.DataFrame({'temperature': hourly}, index=idx)
+
+    if start == 0:
+        print("Sample of disaggregated hourly CMIP6 data:")
+        print(hourly_chunk.head(24))
 
-# Optionally, save to CSV
-hourly_cmip6.to_csv("cmip6_hourly_projection.csv")
+    # The first chunk creates the file and writes the header; the rest append
+    hourly_chunk.to_csv(output_path, mode='w' if start == 0 else 'a', header=start == 0)
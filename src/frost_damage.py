@@ -1,7 +1,40 @@
+import os
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the NumPy implementation below is used
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+def _forcing_units(T, T_base):
+    """
+    Forcing units (positive difference from T_base) as a new float64 array.
+    Missing (NaN) hours give zero forcing, so they are skipped by the running sum
+    the way pandas' cumsum skips them.
+    """
+    forcing = np.subtract(T, T_base, dtype=np.float64)
+    np.fmax(forcing, 0.0, out=forcing)
+    return forcing
+
+def _phenological_stage(cum_forcing, F_mature):
+    """
+    Phenological stage as a new array: cumulative forcing over F_mature, capped at 1.
+    """
+    s = cum_forcing / F_mature
+    # Cap the stage at 1 (i.e., fully mature), in place on the fresh array
+    np.minimum(s, 1.0, out=s)
+    return s
+
 def compute_forcing(hourly_temps, T_base=5.0):
     """
     Compute cumulative forcing from hourly temperatures.
@@ -18,10 +51,10 @@ def compute_forcing(hourly_temps, T_base=5.0):
     pd.Series
         Cumulative forcing (degree-hours) calculated from T_base.
     """
-    # Forcing unit: positive difference from T_base (if any)
-    forcing_units = np.maximum(0, hourly_temps - T_base)
-    cumulative_forcing = forcing_units.cumsum()
-    return cumulative_forcing
+    # Forcing unit: positive difference from T_base (if any), summed in place
+    forcing = _forcing_units(hourly_temps.to_numpy(), T_base)
+    np.add.accumulate(forcing, out=forcing)
+    return pd.Series(forcing, index=hourly_temps.index, name=hourly_temps.name)
 
 def compute_phenological_stage(cum_forcing, F_mature):
     """
@@ -39,10 +72,8 @@ def compute_phenological_stage(cum_forcing, F_mature):
     pd.Series
         Phenological stage (0 to 1).
     """
-    s = cum_forcing / F_mature
-    # Cap the stage at 1 (i.e., fully mature)
-    s[s > 1] = 1
-    return s
+    s = _phenological_stage(cum_forcing.to_numpy(), F_mature)
+    return pd.Series(s, index=cum_forcing.index, name=cum_forcing.name)
 
 def sensitivity_function(s):
     """
@@ -84,7 +115,48 @@ def hourly_frost_damage(T_hour, s, T_crit=0.0):
     damage = sensitivity_function(s) * deficit
     return damage
 
-def compute_cumulative_frost_damage(df, budburst_time, end_time, T_crit=0.0, T_base=5.0, F_mature=1000.0):
+# Fast-math flags without 'nnan': missing hours are NaN and must be handled exactly.
+# NumPy error model: division by F_mature follows NumPy rules (inf/NaN, no exception)
+@njit(cache=True, fastmath={'reassoc', 'contract', 'arcp', 'nsz'}, boundscheck=False,
+      error_model='numpy')
+def _cum_damage(T, T_base, F_mature, T_crit):
+    """
+    Fused forcing -> cumulative forcing -> stage -> damage total in a single pass,
+    without materializing any per-hour array. Missing (NaN) hours add no forcing
+    and no damage.
+    
+    Parameters:
+    -----------
+    T : np.ndarray
+        Hourly temperatures (°C).
+    T_base, F_mature, T_crit : float
+        As in compute_cumulative_frost_damage.
+    
+    Returns:
+    --------
+    float
+        Total cumulative frost damage.
+    """
+    cum = 0.0
+    total = 0.0
+    for i in range(T.shape[0]):
+        f = T[i] - T_base
+        if f > 0.0:
+            cum += f
+        s = cum / F_mature
+        if s > 1.0:
+            s = 1.0
+        deficit = T_crit - T[i]
+        # Written so that a NaN deficit is clamped to zero as well
+        if not deficit > 0.0:
+            deficit = 0.0
+        d = (1.0 - s) * deficit
+        if d == d:
+            total += d
+    return total
+
+def compute_cumulative_frost_damage(df, budburst_time, end_time, T_crit=0.0, T_base=5.0, F_mature=1000.0,
+                                    return_frame=False):
     """
     Compute cumulative frost damage over a vulnerable period using hourly data.
     
@@ -102,40 +174,75 @@ def compute_cumulative_frost_damage(df, budburst_time, end_time, T_crit=0.0, T_b
         Base temperature for forcing accumulation (°C).
     F_mature : float
         Total forcing required for full leaf maturation.
+    return_frame : bool
+        Also return the hourly computations as a DataFrame.
     
     Returns:
     --------
     float
         Total cumulative frost damage.
     pd.DataFrame
-        DataFrame containing hourly computations (forcing, phenological stage, hourly damage).
+        Only if return_frame is True: the period's rows with the hourly computations
+        (forcing, cumulative forcing, phenological stage, hourly damage) added.
     """
-    # Filter the data to the vulnerable period (from budburst to end_time)
-    df_period = df.loc[budburst_time:end_time].copy()
+    # Hourly temperatures over the vulnerable period (from budburst to end_time), as
+    # float32; only the running sum needs float64 to avoid drift
+    T = df['temperature'].loc[budburst_time:end_time].to_numpy(np.float32)
     
-    # Calculate forcing units for the period
-    df_period['forcing'] = np.maximum(0, df_period['temperature'] - T_base)
-    df_period['cum_forcing'] = df_period['forcing'].cumsum()
+    if NUMBA_AVAILABLE and not return_frame:
+        # Total damage from one compiled pass over the temperatures
+        return _cum_damage(T, float(T_base), float(F_mature), float(T_crit))
+    
+    # Calculate forcing units for the period (same helpers as compute_forcing and
+    # compute_phenological_stage), in a float64 buffer the running sum can reuse
+    forcing = _forcing_units(T, T_base)
+    if return_frame:
+        cum_forcing = np.add.accumulate(forcing)
+    else:
+        # The forcing units are not needed once summed: accumulate in place
+        cum_forcing = np.add.accumulate(forcing, out=forcing)
     
     # Compute phenological stage based on cumulative forcing
-    df_period['s'] = compute_phenological_stage(df_period['cum_forcing'], F_mature)
+    s = _phenological_stage(cum_forcing, F_mature)
     
     # Calculate hourly damage using the temperature and current phenological stage
-    df_period['hourly_damage'] = df_period.apply(
-        lambda row: hourly_frost_damage(row['temperature'], row['s'], T_crit), axis=1
-    )
+    # (vectorized form of hourly_frost_damage over the whole period)
+    hourly_damage = np.maximum(0.0, T_crit - T) * sensitivity_function(s)
     
-    # Total cumulative damage is the sum of hourly damages
-    total_damage = df_period['hourly_damage'].sum()
+    # Total cumulative damage is the sum of hourly damages (missing hours skipped)
+    total_damage = np.nansum(hourly_damage)
     
+    if not return_frame:
+        return total_damage
+    
+    # Attach all hourly columns to the period's rows in a single step
+    df_period = df.loc[budburst_time:end_time].assign(
+        forcing=forcing, cum_forcing=cum_forcing, s=s, hourly_damage=hourly_damage
+    )
     return total_damage, df_period
 
+def _warm():
+    """
+    Compile the numba kernel ahead of the first real call (or load it from the
+    on-disk cache) by running it once on tiny inputs.
+    Both float64 and float32 frames are used, since each dtype compiles to a
+    separate numba signature.
+    """
+    times = pd.date_range("2000-01-01", periods=2, freq="h")
+    for dtype in (np.float64, np.float32):
+        df = pd.DataFrame({"temperature": np.zeros(2, dtype=dtype)}, index=times)
+        compute_cumulative_frost_damage(df, times[0], times[-1])
+
+# Set MULBERRY_WARM_JIT=1 to pay the compile cost at import time instead
+if NUMBA_AVAILABLE and os.environ.get('MULBERRY_WARM_JIT'):
+    _warm()
+
 # Example usage
 if __name__ == "__main__":
     # Create sample hourly data from budburst to 10 days later
     start_time = datetime(2023, 4, 1, 0, 0)
     end_time = datetime(2023, 4, 10, 23, 0)
-    times = pd.date_range(start=start_time, end=end_time, freq='H')
+    times = pd.date_range(start=start_time, end=end_time, freq='h')
     
     # Generate synthetic hourly temperature data with a diurnal cycle
     # (for demonstration purposes, using a sine function plus random noise)
@@ -151,7 +258,7 @@ if __name__ == "__main__":
     
     # Compute cumulative frost damage over the vulnerable period
     total_damage, df_damage = compute_cumulative_frost_damage(
-        df, budburst_time, vulnerable_end_time, T_crit, T_base, F_mature
+        df, budburst_time, vulnerable_end_time, T_crit, T_base, F_mature, return_frame=True
     )
     
     print("Total cumulative frost damage:", total_damage)
@@ -1,10 +1,29 @@
+import math
+import os
+
 import pandas as pd
 import numpy as np
 from datetime import timedelta
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the cores below run as plain Python
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # -------------------------------
 # Helper function: Calculate Photoperiod
 # -------------------------------
+# Maximum solar declination (Earth's axial tilt), in radians
+_DECL_MAX = math.radians(23.44)
+
 def calculate_photoperiod(date, latitude):
     """
     Calculate day length (in hours) for a given date and latitude.
@@ -17,25 +36,42 @@ def calculate_photoperiod(date, latitude):
     Returns:
         float: Photoperiod (day length) in hours.
     """
+    # Scalars go through the math module, which avoids NumPy's 0-d array boxing
     # Convert latitude to radians
-    lat_rad = np.radians(latitude)
+    lat_rad = math.radians(latitude)
     
     # Day of year (1-366)
     day_of_year = date.timetuple().tm_yday
     
     # Approximate solar declination (in radians)
-    decl = np.radians(23.44) * np.sin(2 * np.pi * (day_of_year - 81) / 365)
+    decl = _DECL_MAX * math.sin(2 * math.pi * (day_of_year - 81) / 365)
     
     # Calculate the hour angle at sunrise/sunset
-    cos_omega = -np.tan(lat_rad) * np.tan(decl)
+    cos_omega = -math.tan(lat_rad) * math.tan(decl)
     # Ensure cos_omega is within [-1, 1]
-    cos_omega = np.clip(cos_omega, -1, 1)
-    omega = np.arccos(cos_omega)
+    cos_omega = max(-1.0, min(1.0, cos_omega))
+    omega = math.acos(cos_omega)
     
     # Day length: (24/π) * omega
-    day_length = (24 / np.pi) * omega
+    day_length = (24 / math.pi) * omega
     return day_length
 
+def calculate_photoperiod_array(dates, latitude):
+    """
+    Vectorized calculate_photoperiod: day length (in hours) for many dates at once.
+    
+    Parameters:
+        dates (pd.DatetimeIndex): The dates.
+        latitude (float): Latitude in degrees.
+        
+    Returns:
+        np.ndarray: Photoperiod (day length) in hours for each date.
+    """
+    day_of_year = dates.dayofyear.to_numpy()
+    decl = _DECL_MAX * np.sin(2 * np.pi * (day_of_year - 81) / 365)
+    cos_omega = np.clip(-np.tan(np.radians(latitude)) * np.tan(decl), -1, 1)
+    return (24 / np.pi) * np.arccos(cos_omega)
+
 # -------------------------------
 # Chilling unit function
 # -------------------------------
@@ -80,6 +116,106 @@ def forcing_unit(T, photoperiod, T_base=5, alpha=0.1):
     else:
         return 0
 
+# -------------------------------
+# Compiled phenology core
+# -------------------------------
+@njit(cache=True, boundscheck=False)
+def _predict_budburst_core(temps, photoperiods, chill_thr, force_thr, T_base, alpha):
+    """
+    Two-phase chilling/forcing accumulation over daily arrays.
+    Same model as predict_budburst, with chilling_unit and forcing_unit inlined.
+    
+    Parameters:
+        temps (np.ndarray): Daily average temperatures, sorted by date.
+        photoperiods (np.ndarray): Day length (hours) for each day in temps.
+        chill_thr (float): Total chilling units required to break dormancy.
+        force_thr (float): Total forcing units required for budburst.
+        T_base (float): Base temperature for forcing.
+        alpha (float): Coefficient for photoperiod influence.
+    
+    Returns:
+        int: Position of the budburst day in temps (or -1 if not reached).
+    """
+    chilling_sum = 0.0
+    forcing_sum = 0.0
+    chilling_phase = True
+    
+    # zip over the raw arrays: compiles to the same loop under numba, and avoids
+    # per-element indexing when this runs as plain Python
+    for i, (T, photoperiod) in enumerate(zip(temps, photoperiods)):
+        if chilling_phase:
+            chilling_sum += 1.0 if 0.0 <= T <= 7.0 else 0.0
+            if chilling_sum >= chill_thr:
+                # Start the forcing phase on the next day
+                chilling_phase = False
+                forcing_sum = 0.0
+        else:
+            if T > T_base:
+                forcing_sum += (T - T_base) * (1.0 + alpha * (photoperiod - 12.0))
+            if forcing_sum >= force_thr:
+                return i
+    
+    return -1
+
+@njit(parallel=True, cache=True, boundscheck=False)
+def predict_budburst_batch(T_2d, photoperiods, chill_thr, force_thr, T_base, alpha):
+    """
+    Run the budburst model for many sites (or grid cells) sharing the same dates.
+    Sites are independent, so they are processed in parallel threads.
+    
+    Parameters:
+        T_2d (np.ndarray): Daily average temperatures, shape (sites, days), sorted by date.
+        photoperiods (np.ndarray): Day length (hours) for each day, shape (days,).
+        chill_thr (float): Total chilling units required to break dormancy.
+        force_thr (float): Total forcing units required for budburst.
+        T_base (float): Base temperature for forcing.
+        alpha (float): Coefficient for photoperiod influence.
+    
+    Returns:
+        np.ndarray: Position of the budburst day for each site (or -1 if not reached).
+    
+    Raises:
+        ValueError: If photoperiods does not have one value per day of T_2d.
+    """
+    if photoperiods.shape[0] != T_2d.shape[1]:
+        raise ValueError("photoperiods must have one value per day (column) of T_2d")
+    
+    out = np.empty(T_2d.shape[0], dtype=np.int64)
+    for k in prange(T_2d.shape[0]):
+        out[k] = _predict_budburst_core(
+            T_2d[k], photoperiods, chill_thr, force_thr, T_base, alpha
+        )
+    return out
+
+def _predict_budburst_cumsum(temps, photoperiods, chill_thr, force_thr, T_base, alpha):
+    """
+    NumPy equivalent of _predict_budburst_core for when numba is unavailable.
+    Both phases are "first day a non-decreasing cumulative sum reaches a threshold",
+    so each is one cumsum plus a binary search instead of a Python loop.
+    
+    Parameters and return value are the same as _predict_budburst_core.
+    """
+    chill_cum = np.cumsum((temps >= 0) & (temps <= 7), dtype=np.float64)
+    i_chill = np.searchsorted(chill_cum, chill_thr)
+    if i_chill >= temps.shape[0]:
+        return -1
+    
+    # Forcing starts from zero on the day after the chilling requirement is met
+    T = temps[i_chill + 1:]
+    force_units = np.where(
+        T > T_base, (T - T_base) * (1 + alpha * (photoperiods[i_chill + 1:] - 12)), 0.0
+    )
+    if (force_units < 0).any():
+        # Very short days can make the photoperiod factor negative; the forcing sum
+        # is then no longer monotonic and cannot be binary-searched
+        return _predict_budburst_core(temps, photoperiods, chill_thr, force_thr, T_base, alpha)
+    
+    force_cum = np.cumsum(force_units)
+    j = np.searchsorted(force_cum, force_thr)
+    if j >= force_cum.shape[0]:
+        return -1
+    return i_chill + 1 + j
+
 # -------------------------------
 # Phenology model function
 # -------------------------------
@@ -100,36 +236,40 @@ def predict_budburst(df, latitude, chilling_threshold, forcing_threshold, T_base
     Returns:
         pd.Timestamp: Predicted budburst date (or None if not reached).
     """
-    # Ensure DataFrame is sorted by date
-    df = df.sort_values('date').reset_index(drop=True)
+    # Ensure DataFrame is sorted by date (positions are used below, not labels)
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', ignore_index=True)
     
-    chilling_sum = 0.0
-    forcing_sum = 0.0
-    budburst_date = None
-    chilling_phase = True  # Start in the chilling phase
-    
-    for idx, row in df.iterrows():
-        current_date = row['date']
-        T = row['temperature']
-        # Calculate photoperiod for current date at given latitude
-        photoperiod = calculate_photoperiod(current_date, latitude)
-        
-        if chilling_phase:
-            # Accumulate chilling units
-            chilling_sum += chilling_unit(T)
-            # Check if chilling requirement is met
-            if chilling_sum >= chilling_threshold:
-                # Start the forcing phase on the next day
-                chilling_phase = False
-                forcing_sum = 0.0  # Reset forcing accumulation
-        else:
-            # Accumulate forcing units
-            forcing_sum += forcing_unit(T, photoperiod, T_base, alpha)
-            if forcing_sum >= forcing_threshold:
-                budburst_date = current_date
-                break
-                
-    return budburst_date
+    temps = df['temperature'].to_numpy(np.float64)
+    # Photoperiod for every date at the given latitude, computed once up front
+    photoperiods = calculate_photoperiod_array(pd.DatetimeIndex(df['date']), latitude)
+    
+    # The compiled loop stops at budburst; without numba the cumsum form is faster
+    core = _predict_budburst_core if NUMBA_AVAILABLE else _predict_budburst_cumsum
+    i = core(
+        temps, photoperiods, float(chilling_threshold), float(forcing_threshold),
+        float(T_base), float(alpha)
+    )
+    if i < 0:
+        return None
+    return df['date'].iloc[i]
+
+def _warm():
+    """
+    Compile the numba cores ahead of the first real call (or load them from the
+    on-disk cache) by running them once on tiny inputs.
+    Both float64 and float32 frames are used, since each dtype compiles to a
+    separate numba signature.
+    """
+    dates = pd.date_range("2000-01-01", periods=3, freq="D")
+    for dtype in (np.float64, np.float32):
+        temps = np.array([3.0, 10.0, 10.0], dtype=dtype)
+        predict_budburst(pd.DataFrame({"date": dates, "temperature": temps}), 0.0, 1, 1)
+    predict_budburst_batch(np.zeros((1, 3)), np.full(3, 12.0), 1.0, 1.0, 5.0, 0.1)
+
+# Set MULBERRY_WARM_JIT=1 to pay the compile cost at import time instead
+if NUMBA_AVAILABLE and os.environ.get('MULBERRY_WARM_JIT'):
+    _warm()
 
 # -------------------------------
 # Example usage